@@ -0,0 +1,10 @@
+import os
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'notification_service.settings')
+
+app = Celery('notification_service')
+
+# All CELERY_* names in settings.py configure the app
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
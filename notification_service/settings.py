@@ -1,8 +1,20 @@
 import os
+from functools import lru_cache
 from pathlib import Path
+from urllib.parse import quote, urlsplit
 from dotenv import load_dotenv
 
-load_dotenv()
+
+@lru_cache(maxsize=1)
+def _bootstrap_env():
+    """Load .env once per process; forked workers inherit the sentinel and skip it"""
+    if not os.environ.get('_ENV_LOADED'):
+        load_dotenv()
+        os.environ['_ENV_LOADED'] = '1'
+    return True
+
+
+_bootstrap_env()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -62,28 +74,52 @@ TEMPLATES = [
 WSGI_APPLICATION = 'notification_service.wsgi.application'
 
 # Database - MongoDB with Djongo - FIXED VERSION
-def get_mongodb_port():
-    """Extract port from MONGODB_PORT environment variable"""
-    port_value = os.environ.get('MONGODB_PORT', '27017')
+def _split_netloc(value, default_host, default_port):
+    """
+    Split 'host', 'host:port', '[::1]:port' or a full URL (Kubernetes service
+    env var like 'tcp://10.110.173.57:27017') into (host, port). IPv6 hosts
+    are returned bracketed.
+    """
+    if '://' not in value and '[' not in value and value.count(':') > 1:
+        # Bare IPv6 literal without a port
+        return f'[{value}]', default_port
+    parts = urlsplit(value if '://' in value else f'tcp://{value}')
     try:
-        # Handle cases where port might be a full URL (Kubernetes service env var)
-        if '://' in port_value:
-            # Extract port from URL like 'tcp://10.110.173.57:27017'
-            return int(port_value.split(':')[-1])
+        port = parts.port
+    except ValueError:
+        # Non-numeric or out-of-range port
+        port = None
+    host = parts.hostname
+    if host and ':' in host:
+        # urlsplit drops the brackets of an IPv6 literal; MongoClient and the
+        # broker URL both need them back
+        host = f'[{host}]'
+    return host or default_host, port or default_port
+
+
+@lru_cache(maxsize=None)
+def _parse_hostport(env_host, env_port, default_host, default_port):
+    """Resolve (host, port) from a pair of environment variables"""
+    host, port = _split_netloc(os.environ.get(env_host, default_host), default_host, default_port)
+
+    port_value = os.environ.get(env_port)
+    if port_value:
+        if port_value.isdigit():
+            port = int(port_value)
         else:
-            return int(port_value)
-    except (ValueError, IndexError):
-        return 27017  # Default fallback
-
-def get_mongodb_host():
-    """Extract host from MONGODB_HOST environment variable"""
-    host_value = os.environ.get('MONGODB_HOST', 'localhost')
-    # Handle cases where host might be a full URL
-    if '://' in host_value:
-        # Extract host from URL like 'tcp://10.110.173.57:27017'
-        return host_value.split('://')[1].split(':')[0]
-    else:
-        return host_value
+            _, port = _split_netloc(port_value, host, port)
+
+    return host, port
+
+
+MONGODB_HOST, MONGODB_PORT = _parse_hostport('MONGODB_HOST', 'MONGODB_PORT', 'localhost', 27017)
+
+# Write concern for this process. The event consumer runs with w=0: notification
+# rows are an append-only log and an unacknowledged insert that is lost on a
+# MongoDB crash is acceptable, so inserts don't wait a round-trip for the ACK.
+# Keep the acknowledged default (1) for the API - djongo reads the matched count
+# of every UPDATE, which unacknowledged writes cannot report.
+MONGODB_WRITE_CONCERN = int(os.environ.get('MONGODB_WRITE_CONCERN', 1))
 
 DATABASES = {
     'default': {
@@ -91,41 +127,66 @@ DATABASES = {
         'NAME': os.environ.get('MONGODB_NAME', 'notification_db'),
         'ENFORCE_SCHEMA': False,
         'CLIENT': {
-            'host': get_mongodb_host(),
-            'port': get_mongodb_port(),
+            'host': MONGODB_HOST,
+            'port': MONGODB_PORT,
             'username': os.environ.get('MONGODB_USER', 'admin'),
             'password': os.environ.get('MONGODB_PASSWORD', 'admin123'),
             'authSource': 'admin',
             'authMechanism': 'SCRAM-SHA-1',
+            'w': MONGODB_WRITE_CONCERN,
         }
     }
 }
 
-# RabbitMQ Configuration - Also add similar fixes
-def get_rabbitmq_port():
-    """Extract port from RABBITMQ_PORT environment variable"""
-    port_value = os.environ.get('RABBITMQ_PORT', '5672')
-    try:
-        if '://' in port_value:
-            return int(port_value.split(':')[-1])
-        else:
-            return int(port_value)
-    except (ValueError, IndexError):
-        return 5672
-
-def get_rabbitmq_host():
-    """Extract host from RABBITMQ_HOST environment variable"""
-    host_value = os.environ.get('RABBITMQ_HOST', 'localhost')
-    if '://' in host_value:
-        return host_value.split('://')[1].split(':')[0]
-    else:
-        return host_value
-
-RABBITMQ_HOST = get_rabbitmq_host()
-RABBITMQ_PORT = get_rabbitmq_port()
+# RabbitMQ Configuration
+RABBITMQ_HOST, RABBITMQ_PORT = _parse_hostport('RABBITMQ_HOST', 'RABBITMQ_PORT', 'localhost', 5672)
 RABBITMQ_USER = os.environ.get('RABBITMQ_USER', 'guest')
 RABBITMQ_PASSWORD = os.environ.get('RABBITMQ_PASSWORD', 'guest')
 
+# Celery - API notifications are delivered by workers, brokered by RabbitMQ
+CELERY_BROKER_URL = os.environ.get(
+    'CELERY_BROKER_URL',
+    f"amqp://{quote(RABBITMQ_USER, safe='')}:{quote(RABBITMQ_PASSWORD, safe='')}@{RABBITMQ_HOST}:{RABBITMQ_PORT}//"
+)
+# A Redis-protocol broker (Redis or DragonflyDB, e.g. redis://dragonfly:6379/0)
+# can be used instead; tasks then go through Celery's list-based transport
+if CELERY_BROKER_URL.startswith(('redis://', 'rediss://')):
+    CELERY_BROKER_TRANSPORT_OPTIONS = {
+        'global_keyprefix': 'notif:',
+        'visibility_timeout': 3600,
+    }
+# Ack after the task runs so a worker crash redelivers it; the task skips
+# notifications that are no longer PENDING
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_IGNORE_RESULT = True
+# Email and SMS have their own queues (and workers) so one slow provider
+# doesn't hold up the other channel
+CELERY_TASK_ROUTES = {
+    'notifications.tasks.deliver_email': {'queue': 'email_queue'},
+    'notifications.tasks.deliver_sms': {'queue': 'sms_queue'},
+}
+# Per-worker send rate, kept under each provider's limits
+CELERY_TASK_ANNOTATIONS = {
+    'notifications.tasks.deliver_email': {
+        'rate_limit': os.environ.get('EMAIL_RATE_LIMIT', '12/s'),
+    },
+    'notifications.tasks.deliver_sms': {
+        'rate_limit': os.environ.get('SMS_RATE_LIMIT', '20/s'),
+    },
+}
+
+# Cache - per-process by default; set REDIS_URL to share it across workers
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -160,7 +221,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'notifications.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -219,4 +280,7 @@ EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True').lower() == 'true'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
-DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@eci.com')
\ No newline at end of file
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@eci.com')
+
+# The mock send_email/send_sms only sleep to imitate provider latency when enabled
+SIMULATE_LATENCY = os.environ.get('SIMULATE_LATENCY', 'False').lower() == 'true'
\ No newline at end of file
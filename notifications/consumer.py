@@ -1,8 +1,12 @@
 import pika
-import json
+import orjson
 import logging
 import os
+import signal
 import django
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache, partial
 from urllib.parse import urlparse
 
 # Setup Django
@@ -15,12 +19,43 @@ from notifications.services import (
     format_order_confirmation_email,
     format_payment_success_email,
     format_shipment_notification,
-    format_order_cancellation_email
+    format_order_cancellation_email,
+    format_order_delivered_email,
+    format_payment_failed_email,
+    format_payment_refunded_email,
+    format_shipment_sms
 )
+from django.conf import settings
+from django.db import connection as db_connection
 from django.utils import timezone
+from pymongo.errors import BulkWriteError
 
 logger = logging.getLogger(__name__)
 
+# Notifications are buffered and written with one bulk insert per batch. The
+# batch is flushed when it is full or after BATCH_FLUSH_INTERVAL seconds,
+# whichever comes first; prefetch matches the batch size so a full batch can
+# always accumulate. Larger batches mean fewer ack frames to the broker.
+BATCH_SIZE = int(os.environ.get('CONSUMER_BATCH_SIZE', 50))
+BATCH_FLUSH_INTERVAL = float(os.environ.get('CONSUMER_BATCH_FLUSH_INTERVAL', 0.2))  # seconds
+
+# Email/SMS delivery runs on a worker pool so slow providers don't block the
+# connection's IO loop; results are handed back with add_callback_threadsafe().
+# Prefetch never drops below the worker count so the pool stays busy.
+SEND_WORKERS = 16
+_send_pool = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix='notification-send')
+
+# Initial connection retries are left to pika (ConnectionParameters)
+CONNECTION_ATTEMPTS = 5
+CONNECTION_RETRY_DELAY = 5  # seconds
+
+# Exchanges and the routing keys bound to the service queue
+QUEUE_NAME = 'notification_service_events'
+EVENT_BINDINGS = {
+    'order_events': ['order.confirmed', 'order.cancelled', 'order.delivered'],
+    'payment_events': ['payment.succeeded', 'payment.failed', 'payment.refunded'],
+    'shipping_events': ['shipment.shipped', 'shipment.delivered']
+}
 
 def get_rabbitmq_connection():
     """Create RabbitMQ connection with support for URL or separate parameters"""
@@ -46,30 +81,26 @@ def get_rabbitmq_connection():
                 virtual_host=virtual_host,
                 credentials=credentials,
                 heartbeat=600,
-                blocked_connection_timeout=300
+                blocked_connection_timeout=300,
+                connection_attempts=CONNECTION_ATTEMPTS,
+                retry_delay=CONNECTION_RETRY_DELAY
             )
             logger.info(f"Connecting to RabbitMQ via URL: {host}:{port}{virtual_host}")
         else:
-            # Fall back to separate environment variables
+            # Fall back to the RABBITMQ_* settings (already parsed into host/port)
             credentials = pika.PlainCredentials(
-                os.environ.get('RABBITMQ_USER', 'guest'),
-                os.environ.get('RABBITMQ_PASSWORD', 'guest')
+                settings.RABBITMQ_USER,
+                settings.RABBITMQ_PASSWORD
             )
-            
-            # Handle port conversion safely
-            port_str = os.environ.get('RABBITMQ_PORT', '5672')
-            try:
-                port = int(port_str)
-            except ValueError:
-                logger.warning(f"Invalid port {port_str}, using default 5672")
-                port = 5672
-                
             parameters = pika.ConnectionParameters(
-                host=os.environ.get('RABBITMQ_HOST', 'localhost'),
-                port=port,
+                # pika resolves the host itself and doesn't accept a bracketed IPv6 literal
+                host=settings.RABBITMQ_HOST.strip('[]'),
+                port=settings.RABBITMQ_PORT,
                 credentials=credentials,
                 heartbeat=600,
-                blocked_connection_timeout=300
+                blocked_connection_timeout=300,
+                connection_attempts=CONNECTION_ATTEMPTS,
+                retry_delay=CONNECTION_RETRY_DELAY
             )
             logger.info(f"Connecting to RabbitMQ via separate parameters: {parameters.host}:{parameters.port}")
         
@@ -82,6 +113,23 @@ def get_rabbitmq_connection():
         return None
 
 
+def declare_topology(channel):
+    """Declare the service queue and bind it to every EVENT_BINDINGS exchange"""
+    # Declare queue
+    channel.queue_declare(queue=QUEUE_NAME, durable=True)
+    
+    # Bind to all relevant exchanges
+    for exchange, routing_keys in EVENT_BINDINGS.items():
+        channel.exchange_declare(exchange=exchange, exchange_type='topic', durable=True)
+        for routing_key in routing_keys:
+            channel.queue_bind(
+                exchange=exchange,
+                queue=QUEUE_NAME,
+                routing_key=routing_key
+            )
+            logger.info(f"Bound to {exchange} with routing key {routing_key}")
+
+
 def consume_events():
     """
     Consume events from RabbitMQ exchanges:
@@ -90,445 +138,276 @@ def consume_events():
     - shipping_events (shipment.shipped, shipment.delivered)
     """
     connection = None
-    max_retries = 3
-    retry_count = 0
-    retry_delay = 5  # seconds
-    
-    while retry_count < max_retries:
-        try:
-            connection = get_rabbitmq_connection()
-            if not connection:
-                logger.error(f"Cannot connect to RabbitMQ. Retry {retry_count + 1}/{max_retries}")
-                retry_count += 1
-                if retry_count < max_retries:
-                    logger.info(f"Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                continue
-            
-            channel = connection.channel()
-            
-            # Setup exchanges and queues
-            exchanges = ['order_events', 'payment_events', 'shipping_events']
-            queue_name = 'notification_service_events'
-            
-            # Declare queue
-            channel.queue_declare(queue=queue_name, durable=True)
-            
-            # Bind to all relevant exchanges
-            event_bindings = {
-                'order_events': ['order.confirmed', 'order.cancelled', 'order.delivered'],
-                'payment_events': ['payment.succeeded', 'payment.failed', 'payment.refunded'],
-                'shipping_events': ['shipment.shipped', 'shipment.delivered']
-            }
-            
-            for exchange, routing_keys in event_bindings.items():
-                channel.exchange_declare(exchange=exchange, exchange_type='topic', durable=True)
-                for routing_key in routing_keys:
-                    channel.queue_bind(
-                        exchange=exchange,
-                        queue=queue_name,
-                        routing_key=routing_key
-                    )
-                    logger.info(f"Bound to {exchange} with routing key {routing_key}")
-            
-            def callback(ch, method, properties, body):
-                try:
-                    message = json.loads(body)
-                    event_type = message.get('event_type')
-                    data = message.get('data', {})
-                    
-                    logger.info(f"Received event: {event_type}")
-                    
-                    # Process event
-                    handle_event(event_type, data)
-                    
-                    # Acknowledge message
-                    ch.basic_ack(delivery_tag=method.delivery_tag)
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON message: {str(e)}")
-                    ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
-                except Exception as e:
-                    logger.error(f"Error processing event: {str(e)}")
-                    # Reject and don't requeue if processing fails
-                    ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+    # Set once the batch state exists, i.e. there may be work to flush on exit
+    in_flight = None
+    try:
+        connection = get_rabbitmq_connection()
+        if not connection:
+            logger.error("Cannot connect to RabbitMQ. Exiting.")
+            return
+        
+        channel = connection.channel()
+        declare_topology(channel)
+        
+        pending = []
+        # Delivery tag -> send future, in delivery order. Acks only ever cover
+        # the leading run of tags whose results have been collected.
+        in_flight = OrderedDict()
+        collected = set()
+        batch = {'last_tag': None, 'timer': None}
+        
+        def flush_pending():
+            """Write buffered notifications and ack every message up to the last tag"""
+            if batch['timer'] is not None:
+                connection.remove_timeout(batch['timer'])
+                batch['timer'] = None
+            if pending:
+                save_notifications(pending)
+                pending.clear()
+            if batch['last_tag'] is not None:
+                channel.basic_ack(delivery_tag=batch['last_tag'], multiple=True)
+                batch['last_tag'] = None
+        
+        def on_flush_timer():
+            batch['timer'] = None
+            flush_pending()
+        
+        def on_sent(delivery_tag, future):
+            """Collect a finished send on the IO loop thread"""
+            try:
+                notification = future.result()
+            except Exception as e:
+                logger.error(f"Error processing event: {str(e)}")
+                # Reject and don't requeue if processing fails
+                channel.basic_nack(delivery_tag=delivery_tag, requeue=False)
+                in_flight.pop(delivery_tag)
+                notification = None
+            else:
+                collected.add(delivery_tag)
             
-            # Set QoS
-            channel.basic_qos(prefetch_count=1)
+            if notification is not None:
+                pending.append(notification)
             
-            # Start consuming
-            channel.basic_consume(queue=queue_name, on_message_callback=callback)
+            # Later tags may finish first; only advance the ack past tags
+            # whose sends have all completed
+            while in_flight:
+                tag = next(iter(in_flight))
+                if tag not in collected:
+                    break
+                in_flight.popitem(last=False)
+                collected.discard(tag)
+                batch['last_tag'] = tag
             
-            logger.info("Started consuming events. Waiting for messages...")
-            retry_count = 0  # Reset retry count on successful connection
-            channel.start_consuming()
+            if len(pending) >= BATCH_SIZE:
+                flush_pending()
+            elif batch['timer'] is None:
+                batch['timer'] = connection.call_later(BATCH_FLUSH_INTERVAL, on_flush_timer)
+        
+        def callback(ch, method, properties, body):
+            try:
+                message = orjson.loads(body)
+                event_type = message.get('event_type')
+                data = message.get('data', {})
+            except orjson.JSONDecodeError as e:
+                logger.error(f"Invalid JSON message: {str(e)}")
+                ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+                return
+            except Exception as e:
+                logger.error(f"Error processing event: {str(e)}")
+                # Reject and don't requeue if processing fails
+                ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+                return
             
-        except pika.exceptions.AMQPConnectionError as e:
-            logger.error(f"RabbitMQ connection error: {str(e)}")
-            retry_count += 1
-            if retry_count < max_retries:
-                logger.info(f"Retrying connection in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-                retry_delay *= 2
-            else:
-                logger.error("Max retries exceeded. Exiting.")
-                break
-        except KeyboardInterrupt:
-            logger.info("Consumer stopped by user")
-            break
-        except Exception as e:
-            logger.error(f"Unexpected error in event consumer: {str(e)}")
-            retry_count += 1
-            if retry_count < max_retries:
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-                retry_delay *= 2
-            else:
-                logger.error("Max retries exceeded. Exiting.")
-                break
-        finally:
-            if connection and not connection.is_closed:
-                connection.close()
-                logger.info("RabbitMQ connection closed")
-
-
-def handle_event(event_type, data):
-    """Handle different event types and send notifications"""
-    
-    try:
-        if event_type == 'order.confirmed':
-            handle_order_confirmed(data)
-        elif event_type == 'order.cancelled':
-            handle_order_cancelled(data)
-        elif event_type == 'order.delivered':
-            handle_order_delivered(data)
-        elif event_type == 'payment.succeeded':
-            handle_payment_succeeded(data)
-        elif event_type == 'payment.failed':
-            handle_payment_failed(data)
-        elif event_type == 'payment.refunded':
-            handle_payment_refunded(data)
-        elif event_type == 'shipment.shipped':
-            handle_shipment_shipped(data)
-        elif event_type == 'shipment.delivered':
-            handle_shipment_delivered(data)
-        else:
-            logger.warning(f"Unhandled event type: {event_type}")
+            logger.info(f"Received event: {event_type}")
             
-    except Exception as e:
-        logger.error(f"Error handling event {event_type}: {str(e)}")
-
-
-def handle_order_confirmed(data):
-    """Handle order confirmation event"""
-    try:
-        subject, message = format_order_confirmation_email(data)
+            # Process event on the send pool; the notification is written with the batch
+            future = _send_pool.submit(handle_event, event_type, data)
+            in_flight[method.delivery_tag] = future
+            future.add_done_callback(
+                lambda f, tag=method.delivery_tag: connection.add_callback_threadsafe(partial(on_sent, tag, f))
+            )
         
-        notification = Notification.objects.create(
-            recipient_name=data.get('customer_name', 'Customer'),
-            recipient_email=data.get('customer_email'),
-            notification_type='EMAIL',
-            event_type='order.confirmed',
-            subject=subject,
-            message=message,
-            order_id=data.get('order_id'),
-            metadata=data
-        )
+        # Set QoS
+        channel.basic_qos(prefetch_count=max(BATCH_SIZE, SEND_WORKERS))
         
-        if notification.recipient_email:
-            success, error = send_email(notification.recipient_email, subject, message)
-            if success:
-                notification.status = 'SENT'
-                notification.sent_at = timezone.now()
-                logger.info(f"Order confirmation email sent for order {data.get('order_id')}")
-            else:
-                notification.status = 'FAILED'
-                notification.error_message = error
-                logger.error(f"Failed to send order confirmation email: {error}")
-            notification.save()
-        else:
-            logger.warning("No recipient email provided for order confirmation")
-            
-    except Exception as e:
-        logger.error(f"Error in handle_order_confirmed: {str(e)}")
-
-
-def handle_order_cancelled(data):
-    """Handle order cancellation event"""
-    try:
-        subject, message = format_order_cancellation_email(data)
+        def on_sigterm(signum, frame):
+            # Runs inside start_consuming(); stop from the IO loop so it
+            # returns and the finally block drains and closes cleanly
+            logger.info("Received SIGTERM, stopping consumer")
+            connection.add_callback_threadsafe(channel.stop_consuming)
         
-        notification = Notification.objects.create(
-            recipient_name=data.get('customer_name', 'Customer'),
-            recipient_email=data.get('customer_email'),
-            notification_type='EMAIL',
-            event_type='order.cancelled',
-            subject=subject,
-            message=message,
-            order_id=data.get('order_id'),
-            metadata=data
-        )
+        signal.signal(signal.SIGTERM, on_sigterm)
         
-        if notification.recipient_email:
-            success, error = send_email(notification.recipient_email, subject, message)
-            if success:
-                notification.status = 'SENT'
-                notification.sent_at = timezone.now()
-                logger.info(f"Order cancellation email sent for order {data.get('order_id')}")
-            else:
-                notification.status = 'FAILED'
-                notification.error_message = error
-                logger.error(f"Failed to send order cancellation email: {error}")
-            notification.save()
-        else:
-            logger.warning("No recipient email provided for order cancellation")
-            
+        # Start consuming
+        channel.basic_consume(queue=QUEUE_NAME, on_message_callback=callback)
+        
+        logger.info("Started consuming events. Waiting for messages...")
+        channel.start_consuming()
+        logger.info("Consumer stopped")
+        
+    except pika.exceptions.AMQPConnectionError as e:
+        logger.error(f"RabbitMQ connection error: {str(e)}")
+    except KeyboardInterrupt:
+        logger.info("Consumer stopped by user")
     except Exception as e:
-        logger.error(f"Error in handle_order_cancelled: {str(e)}")
-
-
-def handle_order_delivered(data):
-    """Handle order delivered event"""
-    try:
-        subject = f"Order Delivered - Order #{data.get('order_id')}"
-        message = f"""
-Dear Customer,
+        logger.error(f"Unexpected error in event consumer: {str(e)}")
+    finally:
+        if connection and not connection.is_closed:
+            if in_flight is not None:
+                try:
+                    # Let in-flight sends finish and hand their results back
+                    wait(list(in_flight.values()))
+                    connection.process_data_events(time_limit=0)
+                    flush_pending()
+                except Exception as e:
+                    logger.error(f"Failed to flush pending notifications: {str(e)}")
+            connection.close()
+            logger.info("RabbitMQ connection closed")
 
-Your order has been successfully delivered!
 
-Order ID: {data.get('order_id')}
-Delivered At: {data.get('delivered_at', 'Today')}
+@lru_cache(maxsize=1)
+def _notification_collection():
+    """pymongo collection behind Notification, resolved once per process"""
+    return Notification.collection()
 
-Thank you for shopping with us!
 
-Best regards,
-ECI E-commerce Team
+def _to_document(notification):
     """
-        
-        notification = Notification.objects.create(
-            recipient_name=data.get('customer_name', 'Customer'),
-            recipient_email=data.get('customer_email'),
-            recipient_phone=data.get('customer_phone'),
-            notification_type='EMAIL',
-            event_type='order.delivered',
-            subject=subject,
-            message=message,
-            order_id=data.get('order_id'),
-            metadata=data
-        )
-        
-        if notification.recipient_email:
-            success, error = send_email(notification.recipient_email, subject, message)
-            if success:
-                notification.status = 'SENT'
-                notification.sent_at = timezone.now()
-                logger.info(f"Order delivered email sent for order {data.get('order_id')}")
-            else:
-                notification.status = 'FAILED'
-                notification.error_message = error
-                logger.error(f"Failed to send order delivered email: {error}")
-            notification.save()
-        else:
-            logger.warning("No recipient email provided for order delivered")
-            
-    except Exception as e:
-        logger.error(f"Error in handle_order_delivered: {str(e)}")
+    Notification -> Mongo document, with the values djongo would store.
+    created_at is set by _process(), so auto_now_add is not re-applied here.
+    """
+    return {
+        field.column: field.get_db_prep_save(field.pre_save(notification, False), db_connection)
+        for field in Notification._meta.concrete_fields
+        if not field.primary_key
+    }
 
 
-def handle_payment_succeeded(data):
-    """Handle payment success event"""
-    try:
-        subject, message = format_payment_success_email(data)
-        
-        notification = Notification.objects.create(
-            recipient_name=data.get('customer_name', 'Customer'),
-            recipient_email=data.get('customer_email'),
-            notification_type='EMAIL',
-            event_type='payment.succeeded',
-            subject=subject,
-            message=message,
-            order_id=data.get('order_id'),
-            payment_id=data.get('payment_id'),
-            metadata=data
-        )
-        
-        if notification.recipient_email:
-            success, error = send_email(notification.recipient_email, subject, message)
-            if success:
-                notification.status = 'SENT'
-                notification.sent_at = timezone.now()
-                logger.info(f"Payment success email sent for order {data.get('order_id')}")
-            else:
-                notification.status = 'FAILED'
-                notification.error_message = error
-                logger.error(f"Failed to send payment success email: {error}")
+def _save_individually(notifications):
+    """Save notifications one by one, logging the rows that fail"""
+    for notification in notifications:
+        try:
             notification.save()
-        else:
-            logger.warning("No recipient email provided for payment success")
-            
-    except Exception as e:
-        logger.error(f"Error in handle_payment_succeeded: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error saving notification for order {notification.order_id}: {str(e)}")
 
 
-def handle_payment_failed(data):
-    """Handle payment failure event"""
+def save_notifications(notifications):
+    """Insert a batch of notifications, falling back to per-row saves on failure"""
     try:
-        subject = f"Payment Failed - Order #{data.get('order_id')}"
-        message = f"""
-Dear Customer,
-
-Your payment could not be processed.
-
-Order ID: {data.get('order_id')}
-Amount: ₹{data.get('amount')}
-Reason: {data.get('reason', 'Unknown error')}
-
-Please try again or use a different payment method.
-
-Best regards,
-ECI E-commerce Team
-    """
-        
-        notification = Notification.objects.create(
-            recipient_name=data.get('customer_name', 'Customer'),
-            recipient_email=data.get('customer_email'),
-            notification_type='EMAIL',
-            event_type='payment.failed',
-            subject=subject,
-            message=message,
-            order_id=data.get('order_id'),
-            payment_id=data.get('payment_id'),
-            metadata=data
+        # Straight to pymongo: skips djongo's SQL compile/translate on the hot path
+        _notification_collection().insert_many(
+            [_to_document(notification) for notification in notifications],
+            ordered=False
         )
-        
-        if notification.recipient_email:
-            success, error = send_email(notification.recipient_email, subject, message)
-            if success:
-                notification.status = 'SENT'
-                notification.sent_at = timezone.now()
-                logger.info(f"Payment failure email sent for order {data.get('order_id')}")
-            else:
-                notification.status = 'FAILED'
-                notification.error_message = error
-                logger.error(f"Failed to send payment failure email: {error}")
-            notification.save()
-        else:
-            logger.warning("No recipient email provided for payment failure")
-            
+    except BulkWriteError as e:
+        # Unordered insert: every row not listed in writeErrors was written, so
+        # only those are retried. With the deployed w=0 write concern the server
+        # never reports these errors and this branch is not reached.
+        failed = [notifications[error['index']] for error in e.details['writeErrors']]
+        logger.error(f"{len(failed)} of {len(notifications)} notifications failed to insert, saving individually")
+        _save_individually(failed)
     except Exception as e:
-        logger.error(f"Error in handle_payment_failed: {str(e)}")
-
+        logger.error(f"Bulk insert of {len(notifications)} notifications failed, saving individually: {str(e)}")
+        _save_individually(notifications)
 
-def handle_payment_refunded(data):
-    """Handle payment refund event"""
-    try:
-        subject = f"Refund Processed - Order #{data.get('order_id')}"
-        message = f"""
-Dear Customer,
 
-Your refund has been processed successfully!
+# Event type -> (email formatter, extra id fields stored on the notification, SMS formatter)
+EVENT_CONFIG = {
+    'order.confirmed': (format_order_confirmation_email, ('order_id',), None),
+    'order.cancelled': (format_order_cancellation_email, ('order_id',), None),
+    'order.delivered': (format_order_delivered_email, ('order_id',), None),
+    'payment.succeeded': (format_payment_success_email, ('order_id', 'payment_id'), None),
+    'payment.failed': (format_payment_failed_email, ('order_id', 'payment_id'), None),
+    'payment.refunded': (format_payment_refunded_email, ('order_id', 'payment_id'), None),
+    'shipment.shipped': (format_shipment_notification, ('order_id', 'shipment_id'), format_shipment_sms),
+}
 
-Order ID: {data.get('order_id')}
-Refund Amount: ₹{data.get('refund_amount')}
-Reason: {data.get('reason', 'Order cancellation')}
+# Events that reuse another event's notification (and are recorded as it)
+EVENT_ALIASES = {
+    'shipment.delivered': 'order.delivered',
+}
 
-The amount will be credited to your original payment method within 5-7 business days.
 
-Best regards,
-ECI E-commerce Team
+def handle_event(event_type, data):
     """
-        
-        notification = Notification.objects.create(
-            recipient_name=data.get('customer_name', 'Customer'),
-            recipient_email=data.get('customer_email'),
-            notification_type='EMAIL',
-            event_type='payment.refunded',
-            subject=subject,
-            message=message,
-            order_id=data.get('order_id'),
-            payment_id=data.get('payment_id'),
-            metadata=data
-        )
-        
-        if notification.recipient_email:
-            success, error = send_email(notification.recipient_email, subject, message)
-            if success:
-                notification.status = 'SENT'
-                notification.sent_at = timezone.now()
-                logger.info(f"Refund processed email sent for order {data.get('order_id')}")
-            else:
-                notification.status = 'FAILED'
-                notification.error_message = error
-                logger.error(f"Failed to send refund email: {error}")
-            notification.save()
-        else:
-            logger.warning("No recipient email provided for refund")
-            
-    except Exception as e:
-        logger.error(f"Error in handle_payment_refunded: {str(e)}")
-
-
-def handle_shipment_shipped(data):
-    """Handle shipment shipped event"""
+    Handle different event types and send notifications.
+    Returns the unsaved Notification, or None if nothing should be stored.
+    """
+    
     try:
-        subject, message = format_shipment_notification(data)
-        
-        notification = Notification.objects.create(
-            recipient_name=data.get('customer_name', 'Customer'),
-            recipient_email=data.get('customer_email'),
-            recipient_phone=data.get('customer_phone'),
-            notification_type='EMAIL',
-            event_type='shipment.shipped',
-            subject=subject,
-            message=message,
-            order_id=data.get('order_id'),
-            shipment_id=data.get('shipment_id'),
-            metadata=data
-        )
-        
-        email_sent = False
-        sms_sent = False
-        
-        # Send email
-        if notification.recipient_email:
-            email_success, email_error = send_email(notification.recipient_email, subject, message)
-            if email_success:
-                email_sent = True
-                logger.info(f"Shipment notification email sent for order {data.get('order_id')}")
-            else:
-                logger.error(f"Failed to send shipment email: {email_error}")
-        
-        # Also send SMS
-        if notification.recipient_phone:
-            sms_message = f"Your order #{data.get('order_id')} has been shipped via {data.get('carrier')}. Track: {data.get('tracking_no')}"
-            sms_success, sms_error = send_sms(notification.recipient_phone, sms_message)
-            if sms_success:
-                sms_sent = True
-                logger.info(f"Shipment notification SMS sent for order {data.get('order_id')}")
-            else:
-                logger.error(f"Failed to send shipment SMS: {sms_error}")
-        
-        if email_sent or sms_sent:
-            notification.status = 'SENT'
-            notification.sent_at = timezone.now()
+        notification_event = EVENT_ALIASES.get(event_type, event_type)
+        config = EVENT_CONFIG.get(notification_event)
+        if config:
+            return _process(notification_event, data, *config)
         else:
-            notification.status = 'FAILED'
-            notification.error_message = "Both email and SMS failed"
+            logger.warning(f"Unhandled event type: {event_type}")
             
-        notification.save()
-        
     except Exception as e:
-        logger.error(f"Error in handle_shipment_shipped: {str(e)}")
+        logger.error(f"Error handling event {event_type}: {str(e)}")
 
 
-def handle_shipment_delivered(data):
-    """Handle shipment delivered event"""
-    # This is same as order delivered, so reuse that handler
-    handle_order_delivered(data)
+def _process(event_type, data, formatter, extra_fields, sms_formatter):
+    """Build the notification for an event, deliver it and return it unsaved"""
+    email = data.get('customer_email')
+    phone = data.get('customer_phone')
+    if not email and not (sms_formatter and phone):
+        # Nothing can be delivered, so don't store a row that stays PENDING
+        logger.warning(f"No recipient email provided for {event_type}, skipping")
+        return None
+    
+    subject, message = formatter(data)
+    
+    notification = Notification(
+        recipient_name=data.get('customer_name', 'Customer'),
+        recipient_email=email,
+        recipient_phone=phone,
+        notification_type='EMAIL',
+        event_type=event_type,
+        subject=subject,
+        message=message,
+        metadata=data,
+        **{field: data.get(field) for field in extra_fields}
+    )
+    
+    sent = False
+    errors = []
+    
+    if email:
+        success, error = send_email(email, subject, message)
+        if success:
+            sent = True
+            logger.info(f"{event_type} email sent for order {data.get('order_id')}")
+        else:
+            errors.append(error)
+            logger.error(f"Failed to send {event_type} email: {error}")
+    else:
+        logger.warning(f"No recipient email provided for {event_type}")
+    
+    if sms_formatter and phone:
+        success, error = send_sms(phone, sms_formatter(data))
+        if success:
+            sent = True
+            logger.info(f"{event_type} SMS sent for order {data.get('order_id')}")
+        else:
+            errors.append(error)
+            logger.error(f"Failed to send {event_type} SMS: {error}")
+    
+    # One timestamp per message, taken once delivery has finished
+    now = timezone.now()
+    notification.created_at = now
+    
+    if sent:
+        notification.status = 'SENT'
+        notification.sent_at = now
+    elif errors:
+        notification.status = 'FAILED'
+        notification.error_message = '; '.join(errors)
+    
+    # Stored by the consumer with the next batch
+    return notification
 
 
 if __name__ == '__main__':
-    import time
     logger.info("Starting Notification Service Event Consumer...")
     consume_events()
\ No newline at end of file
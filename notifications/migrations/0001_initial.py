@@ -0,0 +1,62 @@
+# Generated by Django 4.1.13 on 2026-10-14 19:39
+
+import django.core.validators
+from django.db import migrations, models
+import djongo.models.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('_id', djongo.models.fields.ObjectIdField(auto_created=True, primary_key=True, serialize=False)),
+                ('notification_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('recipient_email', models.EmailField(blank=True, max_length=254, null=True, validators=[django.core.validators.EmailValidator()])),
+                ('recipient_phone', models.CharField(blank=True, max_length=15, null=True)),
+                ('recipient_name', models.CharField(max_length=255)),
+                ('notification_type', models.CharField(choices=[('EMAIL', 'Email'), ('SMS', 'SMS'), ('PUSH', 'Push Notification')], max_length=10)),
+                ('event_type', models.CharField(choices=[('order.confirmed', 'Order Confirmed'), ('order.cancelled', 'Order Cancelled'), ('order.delivered', 'Order Delivered'), ('payment.succeeded', 'Payment Succeeded'), ('payment.failed', 'Payment Failed'), ('payment.refunded', 'Payment Refunded'), ('shipment.shipped', 'Shipment Shipped'), ('shipment.delivered', 'Shipment Delivered')], max_length=50)),
+                ('subject', models.CharField(max_length=500)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed'), ('DELIVERED', 'Delivered')], default='PENDING', max_length=20)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('order_id', models.IntegerField(blank=True, null=True)),
+                ('payment_id', models.IntegerField(blank=True, null=True)),
+                ('shipment_id', models.IntegerField(blank=True, null=True)),
+                ('metadata', djongo.models.fields.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('retry_count', models.IntegerField(default=0)),
+                ('max_retries', models.IntegerField(default=3)),
+            ],
+            options={
+                'db_table': 'notifications',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['status', 'retry_count', 'created_at'], name='retry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['order_id', '-created_at'], name='order_hist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['event_type'], name='notificatio_event_t_4343b6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at'], name='notificatio_created_e4c995_idx'),
+        ),
+    ]
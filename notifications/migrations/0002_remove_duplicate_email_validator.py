@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-14 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='recipient_email',
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+    ]
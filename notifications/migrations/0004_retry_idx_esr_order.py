@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-15 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='retry_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['status', 'created_at', 'retry_count'], name='retry_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
+from django.db import connection
 from djongo import models
-from django.core.validators import EmailValidator
 import uuid
 
 class Notification(models.Model):
@@ -30,10 +30,11 @@ class Notification(models.Model):
     ]
     
     _id = models.ObjectIdField(primary_key=True)
+    # Public id used in the API's <uuid:notification_id> routes; _id stays internal
     notification_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     
     # Recipient info
-    recipient_email = models.EmailField(validators=[EmailValidator()], null=True, blank=True)
+    recipient_email = models.EmailField(null=True, blank=True)
     recipient_phone = models.CharField(max_length=15, null=True, blank=True)
     recipient_name = models.CharField(max_length=255)
     
@@ -48,9 +49,10 @@ class Notification(models.Model):
     error_message = models.TextField(null=True, blank=True)
     
     # Metadata
-    order_id = models.IntegerField(null=True, blank=True, db_index=True)
+    order_id = models.IntegerField(null=True, blank=True)
     payment_id = models.IntegerField(null=True, blank=True)
     shipment_id = models.IntegerField(null=True, blank=True)
+    # djongo's JSONField, not Django's: the dict is stored as a BSON sub-document
     metadata = models.JSONField(default=dict)
     
     # Timestamps
@@ -66,14 +68,28 @@ class Notification(models.Model):
         db_table = 'notifications'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['event_type']),
+            # Retry queue: status='FAILED' AND retry_count < max_retries ORDER BY created_at.
+            # Equality, sort, range order, so the range on retry_count doesn't
+            # force an in-memory sort on created_at
+            models.Index(fields=['status', 'created_at', 'retry_count'], name='retry_idx'),
+            # Order history: order_id=? ORDER BY created_at DESC
+            models.Index(fields=['order_id', '-created_at'], name='order_hist_idx'),
+            # List filters: <field>=? ORDER BY created_at DESC
+            models.Index(fields=['status', '-created_at'], name='status_list_idx'),
+            models.Index(fields=['notification_type', '-created_at'], name='type_list_idx'),
+            models.Index(fields=['event_type', '-created_at'], name='event_list_idx'),
             models.Index(fields=['created_at']),
         ]
     
     def __str__(self):
         return f"{self.notification_type} - {self.event_type} - {self.status}"
     
+    @classmethod
+    def collection(cls):
+        """Raw pymongo collection, for hot paths that bypass djongo's SQL layer"""
+        connection.ensure_connection()
+        return connection.connection[cls._meta.db_table]
+    
     def can_retry(self):
         """Check if notification can be retried"""
         return self.status == 'FAILED' and self.retry_count < self.max_retries
\ No newline at end of file
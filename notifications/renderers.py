@@ -0,0 +1,13 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson instead of the stdlib json module"""
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        
+        # DRF's encoder covers what orjson doesn't (lazy strings, Decimal, ...)
+        return orjson.dumps(data, default=self.encoder_class().default)
@@ -0,0 +1,90 @@
+from typing import Annotated, Any, Literal, Optional
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator, model_validator
+from pydantic_core import PydanticCustomError
+
+from .models import Notification
+
+# Input validation for the send endpoints runs on pydantic's compiled core
+# instead of DRF serializer fields; DRF is only used to shape responses.
+
+MAX_BULK_NOTIFICATIONS = 500
+
+
+class SendNotificationRequest(BaseModel):
+    """Payload for sending a notification"""
+    
+    # Match DRF CharField: surrounding whitespace is trimmed
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    notification_type: Literal[tuple(choice for choice, _ in Notification.NOTIFICATION_TYPES)]
+    event_type: Literal[tuple(choice for choice, _ in Notification.EVENT_TYPES)]
+    recipient_name: str = Field(min_length=1, max_length=255)
+    # Optional means "may be omitted"; an explicit null is rejected below, as DRF did
+    recipient_email: Optional[str] = None
+    recipient_phone: Optional[str] = Field(None, max_length=15)
+    subject: str = Field(min_length=1, max_length=500)
+    message: str = Field(min_length=1)
+    order_id: Optional[int] = None
+    payment_id: Optional[int] = None
+    shipment_id: Optional[int] = None
+    # Any JSON value, like DRF's JSONField
+    metadata: Any = Field(default_factory=dict)
+    
+    @field_validator(
+        'recipient_name', 'recipient_email', 'recipient_phone', 'subject', 'message', 'metadata',
+        mode='before'
+    )
+    @classmethod
+    def reject_null(cls, value):
+        """Match DRF fields without allow_null: null is an error, omitting the field is not"""
+        if value is None:
+            raise PydanticCustomError('null', "This field may not be null.")
+        return value
+    
+    @field_validator('recipient_name', 'recipient_email', 'recipient_phone', 'subject', 'message', mode='before')
+    @classmethod
+    def coerce_number_to_str(cls, value):
+        """Match DRF CharField: numbers are accepted as text, booleans are not"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        return value
+    
+    @field_validator('recipient_email')
+    @classmethod
+    def validate_recipient_email(cls, value):
+        """Same email rules as the model field (Django's EmailValidator); blank is allowed"""
+        if value:
+            try:
+                validate_email(value)
+            except DjangoValidationError:
+                raise PydanticCustomError('invalid_email', "Enter a valid email address.")
+        return value
+    
+    @model_validator(mode='after')
+    def validate_recipient(self):
+        """Validate that at least one recipient contact is provided"""
+        if self.notification_type == 'EMAIL' and not self.recipient_email:
+            raise PydanticCustomError('recipient_required', "Email is required for EMAIL notifications")
+        
+        if self.notification_type == 'SMS' and not self.recipient_phone:
+            raise PydanticCustomError('recipient_required', "Phone is required for SMS notifications")
+        
+        return self
+
+
+# Bounded so one bulk request stays a bounded insert + enqueue
+BulkSendNotificationRequest = TypeAdapter(
+    Annotated[list[SendNotificationRequest], Field(min_length=1, max_length=MAX_BULK_NOTIFICATIONS)]
+)
+
+
+def validation_details(error):
+    """pydantic ValidationError as {field: [messages]}, the shape of DRF's serializer.errors"""
+    details = {}
+    for err in error.errors(include_url=False):
+        field = '.'.join(str(part) for part in err['loc']) or 'non_field_errors'
+        details.setdefault(field, []).append(err['msg'])
+    return details
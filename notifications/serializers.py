@@ -1,56 +1,68 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Notification
 
-class NotificationSerializer(serializers.ModelSerializer):
-    """Serializer for Notification model"""
-    
-    class Meta:
-        model = Notification
-        fields = [
-            'notification_id', 'recipient_email', 'recipient_phone', 'recipient_name',
-            'notification_type', 'event_type', 'subject', 'message', 'status',
-            'order_id', 'payment_id', 'shipment_id', 'created_at', 'sent_at',
-            'delivered_at', 'error_message', 'retry_count'
-        ]
-        read_only_fields = ['notification_id', 'created_at', 'sent_at', 'delivered_at']
+def _datetime(value):
+    """Render a datetime the way DRF's DateTimeField does (ISO 8601, UTC as 'Z')"""
+    if value is None:
+        return None
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
 
 
-class SendNotificationSerializer(serializers.Serializer):
-    """Serializer for sending notifications"""
-    
-    notification_type = serializers.ChoiceField(choices=Notification.NOTIFICATION_TYPES)
-    event_type = serializers.ChoiceField(choices=Notification.EVENT_TYPES)
-    recipient_name = serializers.CharField(max_length=255)
-    recipient_email = serializers.EmailField(required=False, allow_blank=True)
-    recipient_phone = serializers.CharField(max_length=15, required=False, allow_blank=True)
-    subject = serializers.CharField(max_length=500)
-    message = serializers.CharField()
-    order_id = serializers.IntegerField(required=False, allow_null=True)
-    payment_id = serializers.IntegerField(required=False, allow_null=True)
-    shipment_id = serializers.IntegerField(required=False, allow_null=True)
-    metadata = serializers.JSONField(required=False, default=dict)
+def notification_to_dict(instance):
+    """Full response representation of one Notification"""
+    return {
+        'notification_id': str(instance.notification_id),
+        'recipient_email': instance.recipient_email,
+        'recipient_phone': instance.recipient_phone,
+        'recipient_name': instance.recipient_name,
+        'notification_type': instance.notification_type,
+        'event_type': instance.event_type,
+        'subject': instance.subject,
+        'message': instance.message,
+        'status': instance.status,
+        'order_id': instance.order_id,
+        'payment_id': instance.payment_id,
+        'shipment_id': instance.shipment_id,
+        'created_at': _datetime(instance.created_at),
+        'sent_at': _datetime(instance.sent_at),
+        'delivered_at': _datetime(instance.delivered_at),
+        'error_message': instance.error_message,
+        'retry_count': instance.retry_count,
+    }
+
+
+class NotificationSerializer(serializers.Serializer):
+    """
+    Read-only serializer for Notification. Builds the dict directly instead
+    of going through ModelSerializer's field mapping on every object.
+    Single objects can skip the serializer and call notification_to_dict().
+    """
     
-    def validate(self, data):
-        """Validate that at least one recipient contact is provided"""
-        notification_type = data.get('notification_type')
-        recipient_email = data.get('recipient_email')
-        recipient_phone = data.get('recipient_phone')
-        
-        if notification_type == 'EMAIL' and not recipient_email:
-            raise serializers.ValidationError("Email is required for EMAIL notifications")
-        
-        if notification_type == 'SMS' and not recipient_phone:
-            raise serializers.ValidationError("Phone is required for SMS notifications")
-        
-        return data
+    def to_representation(self, instance):
+        return notification_to_dict(instance)
 
 
-class NotificationListSerializer(serializers.ModelSerializer):
-    """Serializer for listing notifications"""
+class NotificationListSerializer(serializers.Serializer):
+    """Read-only serializer for listing notifications"""
+    
+    # The only columns to_representation() reads; list queries load just these
+    FIELDS = (
+        'notification_id', 'recipient_name', 'notification_type',
+        'event_type', 'status', 'created_at', 'order_id'
+    )
     
-    class Meta:
-        model = Notification
-        fields = [
-            'notification_id', 'recipient_name', 'notification_type',
-            'event_type', 'status', 'created_at', 'order_id'
-        ]
\ No newline at end of file
+    def to_representation(self, instance):
+        return {
+            'notification_id': str(instance.notification_id),
+            'recipient_name': instance.recipient_name,
+            'notification_type': instance.notification_type,
+            'event_type': instance.event_type,
+            'status': instance.status,
+            'created_at': _datetime(instance.created_at),
+            'order_id': instance.order_id,
+        }
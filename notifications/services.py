@@ -1,9 +1,14 @@
 import logging
+import re
 import time
 import random
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# First two characters of the local part, then the domain
+_EMAIL_MASK_RE = re.compile(r'^(.{0,2}).*?(@.+)$')
+
 
 def send_email(to_email, subject, message):
     """
@@ -18,7 +23,8 @@ def send_email(to_email, subject, message):
         logger.info(f"Sending email to {to_email}: {subject}")
         
         # Simulate email sending delay
-        time.sleep(0.5)
+        if settings.SIMULATE_LATENCY:
+            time.sleep(0.5)
         
         # Simulate 95% success rate
         if random.random() < 0.95:
@@ -48,7 +54,8 @@ def send_sms(to_phone, message):
         logger.info(f"Sending SMS to {to_phone}")
         
         # Simulate SMS sending delay
-        time.sleep(0.3)
+        if settings.SIMULATE_LATENCY:
+            time.sleep(0.3)
         
         # Simulate 90% success rate
         if random.random() < 0.90:
@@ -65,45 +72,41 @@ def send_sms(to_phone, message):
         return False, error
 
 
-def format_order_confirmation_email(order_data):
-    """Format order confirmation email"""
-    subject = f"Order Confirmation - Order #{order_data['order_id']}"
-    message = f"""
-Dear {order_data['customer_name']},
+# Message templates, parsed once at import and rendered with str.format_map().
+# Required keys raise KeyError when missing; optional ones get defaults.
+_ORDER_CONFIRMATION_SUBJECT = "Order Confirmation - Order #{order_id}"
+_ORDER_CONFIRMATION_TMPL = """
+Dear {customer_name},
 
 Thank you for your order!
 
 Order Details:
-- Order ID: {order_data['order_id']}
-- Order Total: ₹{order_data['order_total']}
-- Items: {order_data['item_count']} item(s)
+- Order ID: {order_id}
+- Order Total: ₹{order_total}
+- Items: {item_count} item(s)
 
 Your order is being processed and you will receive a shipping confirmation soon.
 
-Track your order: {order_data.get('tracking_url', 'N/A')}
+Track your order: {tracking_url}
 
 Thank you for shopping with us!
 
 Best regards,
 ECI E-commerce Team
     """
-    return subject, message
 
-
-def format_payment_success_email(payment_data):
-    """Format payment success email"""
-    subject = f"Payment Successful - Order #{payment_data['order_id']}"
-    message = f"""
+_PAYMENT_SUCCESS_SUBJECT = "Payment Successful - Order #{order_id}"
+_PAYMENT_SUCCESS_TMPL = """
 Dear Customer,
 
 Your payment has been processed successfully!
 
 Payment Details:
-- Payment ID: {payment_data['payment_id']}
-- Order ID: {payment_data['order_id']}
-- Amount: ₹{payment_data['amount']}
-- Method: {payment_data['method']}
-- Reference: {payment_data['reference']}
+- Payment ID: {payment_id}
+- Order ID: {order_id}
+- Amount: ₹{amount}
+- Method: {method}
+- Reference: {reference}
 
 Your order will be shipped soon.
 
@@ -112,44 +115,36 @@ Thank you!
 Best regards,
 ECI E-commerce Team
     """
-    return subject, message
-
 
-def format_shipment_notification(shipment_data):
-    """Format shipment notification"""
-    subject = f"Your Order has been Shipped - Order #{shipment_data['order_id']}"
-    message = f"""
+_SHIPMENT_SUBJECT = "Your Order has been Shipped - Order #{order_id}"
+_SHIPMENT_TMPL = """
 Dear Customer,
 
 Good news! Your order has been shipped.
 
 Shipment Details:
-- Order ID: {shipment_data['order_id']}
-- Carrier: {shipment_data['carrier']}
-- Tracking Number: {shipment_data['tracking_no']}
-- Expected Delivery: {shipment_data.get('expected_delivery', '2-3 business days')}
+- Order ID: {order_id}
+- Carrier: {carrier}
+- Tracking Number: {tracking_no}
+- Expected Delivery: {expected_delivery}
 
-Track your shipment: {shipment_data.get('tracking_url', 'N/A')}
+Track your shipment: {tracking_url}
 
 Thank you for your patience!
 
 Best regards,
 ECI E-commerce Team
     """
-    return subject, message
 
-
-def format_order_cancellation_email(order_data):
-    """Format order cancellation email"""
-    subject = f"Order Cancelled - Order #{order_data['order_id']}"
-    message = f"""
-Dear {order_data['customer_name']},
+_ORDER_CANCELLATION_SUBJECT = "Order Cancelled - Order #{order_id}"
+_ORDER_CANCELLATION_TMPL = """
+Dear {customer_name},
 
 Your order has been cancelled as requested.
 
 Order Details:
-- Order ID: {order_data['order_id']}
-- Cancellation Reason: {order_data.get('reason', 'Customer request')}
+- Order ID: {order_id}
+- Cancellation Reason: {reason}
 
 If you paid for this order, a refund will be processed within 5-7 business days.
 
@@ -158,19 +153,118 @@ If you have any questions, please contact our support team.
 Best regards,
 ECI E-commerce Team
     """
-    return subject, message
+
+_DELIVERED_SUBJECT = "Order Delivered - Order #{order_id}"
+_DELIVERED_TMPL = """
+Dear Customer,
+
+Your order has been successfully delivered!
+
+Order ID: {order_id}
+Delivered At: {delivered_at}
+
+Thank you for shopping with us!
+
+Best regards,
+ECI E-commerce Team
+    """
+
+_PAYMENT_FAILED_SUBJECT = "Payment Failed - Order #{order_id}"
+_PAYMENT_FAILED_TMPL = """
+Dear Customer,
+
+Your payment could not be processed.
+
+Order ID: {order_id}
+Amount: ₹{amount}
+Reason: {reason}
+
+Please try again or use a different payment method.
+
+Best regards,
+ECI E-commerce Team
+    """
+
+_REFUNDED_SUBJECT = "Refund Processed - Order #{order_id}"
+_REFUNDED_TMPL = """
+Dear Customer,
+
+Your refund has been processed successfully!
+
+Order ID: {order_id}
+Refund Amount: ₹{refund_amount}
+Reason: {reason}
+
+The amount will be credited to your original payment method within 5-7 business days.
+
+Best regards,
+ECI E-commerce Team
+    """
+
+_SHIPPED_SMS_TMPL = "Your order #{order_id} has been shipped via {carrier}. Track: {tracking_no}"
+
+
+def format_order_confirmation_email(order_data):
+    """Format order confirmation email"""
+    context = {'tracking_url': 'N/A', **order_data}
+    return _ORDER_CONFIRMATION_SUBJECT.format_map(context), _ORDER_CONFIRMATION_TMPL.format_map(context)
+
+
+def format_payment_success_email(payment_data):
+    """Format payment success email"""
+    return _PAYMENT_SUCCESS_SUBJECT.format_map(payment_data), _PAYMENT_SUCCESS_TMPL.format_map(payment_data)
+
+
+def format_shipment_notification(shipment_data):
+    """Format shipment notification"""
+    context = {'expected_delivery': '2-3 business days', 'tracking_url': 'N/A', **shipment_data}
+    return _SHIPMENT_SUBJECT.format_map(context), _SHIPMENT_TMPL.format_map(context)
+
+
+def format_order_cancellation_email(order_data):
+    """Format order cancellation email"""
+    context = {'reason': 'Customer request', **order_data}
+    return _ORDER_CANCELLATION_SUBJECT.format_map(context), _ORDER_CANCELLATION_TMPL.format_map(context)
+
+
+# Event payloads for these come from other services and may leave fields out;
+# a missing field renders as 'None', as the consumer's messages always have
+def format_order_delivered_email(data):
+    """Format order delivered email"""
+    context = {'order_id': None, 'delivered_at': 'Today', **data}
+    return _DELIVERED_SUBJECT.format_map(context), _DELIVERED_TMPL.format_map(context)
+
+
+def format_payment_failed_email(data):
+    """Format payment failure email"""
+    context = {'order_id': None, 'amount': None, 'reason': 'Unknown error', **data}
+    return _PAYMENT_FAILED_SUBJECT.format_map(context), _PAYMENT_FAILED_TMPL.format_map(context)
+
+
+def format_payment_refunded_email(data):
+    """Format refund processed email"""
+    context = {'order_id': None, 'refund_amount': None, 'reason': 'Order cancellation', **data}
+    return _REFUNDED_SUBJECT.format_map(context), _REFUNDED_TMPL.format_map(context)
+
+
+def format_shipment_sms(data):
+    """Format shipment SMS"""
+    context = {'order_id': None, 'carrier': None, 'tracking_no': None, **data}
+    return _SHIPPED_SMS_TMPL.format_map(context)
 
 
 def mask_sensitive_data(data):
-    """Mask PII in logs"""
-    if 'email' in data:
-        email = data['email']
-        if '@' in email:
-            parts = email.split('@')
-            data['email'] = f"{parts[0][:2]}***@{parts[1]}"
+    """Mask PII in logs; returns a masked copy and leaves data untouched"""
+    email = data.get('email')
+    phone = data.get('phone')
+    if not (email or phone):
+        return data
+    
+    masked = dict(data)
+    if email and '@' in email:
+        masked['email'] = _EMAIL_MASK_RE.sub(r'\1***\2', email, count=1)
     
-    if 'phone' in data:
-        phone = data['phone']
-        data['phone'] = f"***{phone[-4:]}"
+    if phone:
+        masked['phone'] = '***' + phone[-4:] if len(phone) >= 4 else '***'
     
-    return data
\ No newline at end of file
+    return masked
@@ -0,0 +1,83 @@
+import logging
+from celery import shared_task
+from django.utils import timezone
+
+from .models import Notification
+from .services import send_email, send_sms
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    """A send attempt failed; raised through self.retry() so Celery retries it"""
+
+
+def _email(notification):
+    return send_email(
+        to_email=notification.recipient_email,
+        subject=notification.subject,
+        message=notification.message
+    )
+
+
+def _sms(notification):
+    return send_sms(
+        to_phone=notification.recipient_phone,
+        message=notification.message
+    )
+
+
+def _deliver(task, notification_id, send):
+    """Send a PENDING notification with send() and record the outcome on its row"""
+    try:
+        notification = Notification.objects.get(notification_id=notification_id)
+    except Notification.DoesNotExist:
+        logger.error(f"Notification {notification_id} not found, dropping delivery")
+        return
+    
+    if notification.status != 'PENDING':
+        # Redelivered after the outcome was already stored
+        logger.info(f"Notification {notification_id} already {notification.status}, skipping")
+        return
+    
+    success, error = send(notification)
+    
+    if success:
+        notification.status = 'SENT'
+        notification.sent_at = timezone.now()
+        # Clear the error left by a failed attempt that /retry/ resent
+        notification.error_message = None
+        notification.save(update_fields=['status', 'sent_at', 'error_message'])
+        logger.info(f"Notification {notification_id} sent successfully")
+        return
+    
+    if task.request.retries < task.max_retries:
+        logger.warning(f"Failed to send notification {notification_id}, retrying: {error}")
+        raise task.retry(exc=DeliveryError(error))
+    
+    notification.status = 'FAILED'
+    notification.error_message = error
+    notification.save(update_fields=['status', 'error_message'])
+    logger.error(f"Failed to send notification {notification_id}: {error}")
+
+
+# Routed to email_queue / sms_queue (CELERY_TASK_ROUTES) so each channel
+# has its own workers and a slow provider can't back up the other
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def deliver_email(self, notification_id):
+    """Send a PENDING email notification"""
+    _deliver(self, notification_id, _email)
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def deliver_sms(self, notification_id):
+    """Send a PENDING SMS notification"""
+    _deliver(self, notification_id, _sms)
+
+
+# Notification type -> its delivery task
+DELIVERY_TASKS = {
+    'EMAIL': deliver_email,
+    'SMS': deliver_sms,
+}
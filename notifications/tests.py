@@ -1,3 +1,447 @@
-from django.test import TestCase
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import orjson
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from pydantic import ValidationError
+from rest_framework.test import APIClient
+
+from notification_service.settings import _split_netloc
+from notifications import consumer
+from . import tasks
+from .models import Notification
+from .schemas import BulkSendNotificationRequest, SendNotificationRequest, validation_details
+from .tasks import DELIVERY_TASKS
+from .views import _compute_stats
+
+
+def _notification(**fields):
+    """Saved EMAIL notification with overridable fields"""
+    values = {
+        'recipient_name': 'Asha',
+        'recipient_email': 'asha@example.com',
+        'notification_type': 'EMAIL',
+        'event_type': 'order.confirmed',
+        'subject': 'Order Confirmation',
+        'message': 'Thank you for your order',
+    }
+    values.update(fields)
+    return Notification.objects.create(**values)
+
+
+class _ManualPool:
+    """Stands in for the consumer's send pool; tests resolve the futures themselves"""
+    
+    def __init__(self):
+        self.futures = []
+    
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+class ConsumerAckTests(SimpleTestCase):
+    """consume_events() only acks the leading run of finished deliveries"""
+    
+    def run_consumer(self, scenario):
+        """
+        Run consume_events() against a mocked connection. scenario(channel,
+        deliver, futures, flush) runs inside start_consuming(): deliver(tag)
+        hands the callback a message, futures are the pending sends in delivery
+        order and flush() fires the batch timer. consume_events() logs and
+        swallows exceptions, so scenarios record what they see and the test
+        asserts afterwards. Returns the channel and the notifications written,
+        in write order.
+        """
+        connection = mock.MagicMock(is_closed=False)
+        connection.add_callback_threadsafe.side_effect = lambda callback: callback()
+        timers = []
+        connection.call_later.side_effect = lambda delay, callback: timers.append(callback) or len(timers)
+        channel = connection.channel.return_value
+        pool = _ManualPool()
+        body = orjson.dumps({'event_type': 'order.confirmed', 'data': {}})
+        saved = []
+        
+        def start_consuming():
+            callback = channel.basic_consume.call_args.kwargs['on_message_callback']
+            scenario(
+                channel,
+                lambda tag: callback(channel, SimpleNamespace(delivery_tag=tag), None, body),
+                pool.futures,
+                lambda: timers[-1]()
+            )
+        
+        channel.start_consuming.side_effect = start_consuming
+        
+        with mock.patch.object(consumer, 'get_rabbitmq_connection', return_value=connection), \
+                mock.patch.object(consumer, '_send_pool', pool), \
+                mock.patch.object(consumer, 'BATCH_SIZE', 50), \
+                mock.patch.object(consumer, 'save_notifications', side_effect=saved.extend), \
+                mock.patch.object(consumer.signal, 'signal'):
+            consumer.consume_events()
+        
+        return channel, saved
+    
+    def test_out_of_order_completion_acks_only_the_leading_run(self):
+        seen = {}
+        
+        def scenario(channel, deliver, futures, flush):
+            for tag in (1, 2, 3):
+                deliver(tag)
+            
+            # 3 and 2 finish before 1: their rows are written but nothing is acked
+            futures[2].set_result('third')
+            futures[1].set_result('second')
+            flush()
+            seen['acked_early'] = channel.basic_ack.called
+            
+            # 1 finishing completes the run, so one multiple-ack covers 1-3
+            futures[0].set_result('first')
+            flush()
+        
+        channel, saved = self.run_consumer(scenario)
+        
+        self.assertIs(seen['acked_early'], False)
+        channel.basic_ack.assert_called_once_with(delivery_tag=3, multiple=True)
+        self.assertFalse(channel.basic_nack.called)
+        self.assertEqual(saved, ['third', 'second', 'first'])
+    
+    def test_nack_while_earlier_tags_in_flight(self):
+        seen = {}
+        
+        def scenario(channel, deliver, futures, flush):
+            deliver(1)
+            deliver(2)
+            
+            # 2 fails while 1 is still sending: it is nacked at once, never acked
+            futures[1].set_exception(RuntimeError('send failed'))
+            seen['nacks'] = list(channel.basic_nack.call_args_list)
+            flush()
+            seen['acked_early'] = channel.basic_ack.called
+            
+            futures[0].set_result('first')
+            flush()
+        
+        channel, _ = self.run_consumer(scenario)
+        
+        self.assertEqual(seen['nacks'], [mock.call(delivery_tag=2, requeue=False)])
+        self.assertIs(seen['acked_early'], False)
+        channel.basic_nack.assert_called_once_with(delivery_tag=2, requeue=False)
+        channel.basic_ack.assert_called_once_with(delivery_tag=1, multiple=True)
+
+
+class SplitNetlocTests(SimpleTestCase):
+    """_split_netloc() accepts host, host:port, IPv6 literals and service URLs"""
+    
+    def test_host_and_port(self):
+        self.assertEqual(_split_netloc('mongodb', 'localhost', 27017), ('mongodb', 27017))
+        self.assertEqual(_split_netloc('mongodb:27018', 'localhost', 27017), ('mongodb', 27018))
+    
+    def test_kubernetes_service_url(self):
+        self.assertEqual(_split_netloc('tcp://10.110.173.57:5672', 'localhost', 1), ('10.110.173.57', 5672))
+    
+    def test_ipv6_hosts_stay_bracketed(self):
+        self.assertEqual(_split_netloc('[::1]:27018', 'localhost', 27017), ('[::1]', 27018))
+        self.assertEqual(_split_netloc('[fe80::1]', 'localhost', 27017), ('[fe80::1]', 27017))
+        self.assertEqual(_split_netloc('::1', 'localhost', 27017), ('[::1]', 27017))
+        self.assertEqual(_split_netloc('tcp://[::1]:5672', 'localhost', 1), ('[::1]', 5672))
+    
+    def test_invalid_port_falls_back_to_default(self):
+        self.assertEqual(_split_netloc('rabbitmq:amqp', 'localhost', 5672), ('rabbitmq', 5672))
+
+
+class SendNotificationRequestTests(SimpleTestCase):
+    """pydantic request validation matches the DRF serializer it replaced"""
+    
+    def payload(self, **fields):
+        values = {
+            'notification_type': 'EMAIL',
+            'event_type': 'order.confirmed',
+            'recipient_name': 'Asha',
+            'recipient_email': 'asha@example.com',
+            'subject': 'Order Confirmation',
+            'message': 'Thank you for your order',
+        }
+        values.update(fields)
+        return values
+    
+    def errors(self, data, validator=SendNotificationRequest.model_validate):
+        with self.assertRaises(ValidationError) as raised:
+            validator(data)
+        return validation_details(raised.exception)
+    
+    def test_valid_payload(self):
+        data = SendNotificationRequest.model_validate(self.payload(order_id='42')).model_dump()
+        
+        self.assertEqual(data['order_id'], 42)
+        self.assertEqual(data['metadata'], {})
+        self.assertIsNone(data['recipient_phone'])
+    
+    def test_strings_are_trimmed_and_numbers_coerced(self):
+        data = SendNotificationRequest.model_validate(
+            self.payload(recipient_name=123, subject='  Order Confirmation  ')
+        ).model_dump()
+        
+        self.assertEqual(data['recipient_name'], '123')
+        self.assertEqual(data['subject'], 'Order Confirmation')
+    
+    def test_boolean_text_field_rejected(self):
+        self.assertIn('recipient_name', self.errors(self.payload(recipient_name=True)))
+    
+    def test_missing_and_invalid_fields(self):
+        payload = self.payload(recipient_email='not-an-email', notification_type='FAX')
+        del payload['subject']
+        
+        details = self.errors(payload)
+        
+        self.assertEqual(set(details), {'notification_type', 'recipient_email', 'subject'})
+        self.assertEqual(details['recipient_email'], ['Enter a valid email address.'])
+        self.assertTrue(all(isinstance(messages, list) for messages in details.values()))
+    
+    def test_null_rejected_where_drf_rejected_it(self):
+        for field in ('recipient_name', 'recipient_email', 'recipient_phone', 'metadata'):
+            self.assertEqual(
+                self.errors(self.payload(**{field: None})),
+                {field: ['This field may not be null.']}
+            )
+    
+    def test_metadata_accepts_any_json_value(self):
+        for metadata in ([1, 'two'], 'note', 3):
+            data = SendNotificationRequest.model_validate(self.payload(metadata=metadata)).model_dump()
+            self.assertEqual(data['metadata'], metadata)
+    
+    def test_recipient_required_for_type(self):
+        self.assertEqual(
+            self.errors(self.payload(recipient_email='')),
+            {'non_field_errors': ['Email is required for EMAIL notifications']}
+        )
+        self.assertEqual(
+            self.errors(self.payload(notification_type='SMS')),
+            {'non_field_errors': ['Phone is required for SMS notifications']}
+        )
+    
+    def test_bulk_errors_are_keyed_by_index(self):
+        details = self.errors(
+            [self.payload(), self.payload(subject='')],
+            validator=BulkSendNotificationRequest.validate_python
+        )
+        
+        self.assertEqual(list(details), ['1.subject'])
+        self.assertIn('non_field_errors', self.errors([], validator=BulkSendNotificationRequest.validate_python))
+
+
+class DeliverTaskTests(SimpleTestCase):
+    """deliver_email/deliver_sms record each send's outcome on the row"""
+    
+    def setUp(self):
+        self.notification = Notification(
+            recipient_name='Asha',
+            recipient_email='asha@example.com',
+            notification_type='EMAIL',
+            event_type='order.confirmed',
+            subject='Order Confirmation',
+            message='Thank you for your order'
+        )
+        patches = [
+            mock.patch.object(Notification.objects, 'get', return_value=self.notification),
+            mock.patch.object(self.notification, 'save'),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def deliver(self, *results):
+        """Run deliver_email eagerly with send_email returning results in turn"""
+        with mock.patch.object(tasks, 'send_email', side_effect=results) as send_email:
+            tasks.deliver_email.apply(args=[str(self.notification.notification_id)])
+        return send_email
+    
+    def test_success_marks_sent(self):
+        self.deliver((True, None))
+        
+        self.assertEqual(self.notification.status, 'SENT')
+        self.assertIsNotNone(self.notification.sent_at)
+        self.notification.save.assert_called_once()
+    
+    def test_failure_is_retried_then_marked_failed(self):
+        attempts = tasks.deliver_email.max_retries + 1
+        send_email = self.deliver(*[(False, 'recipient inbox full')] * attempts)
+        
+        self.assertEqual(send_email.call_count, attempts)
+        self.assertEqual(self.notification.status, 'FAILED')
+        self.assertEqual(self.notification.error_message, 'recipient inbox full')
+    
+    def test_success_after_failed_attempt_clears_error(self):
+        self.notification.error_message = 'recipient inbox full'
+        self.notification.retry_count = 1
+        
+        self.deliver((True, None))
+        
+        self.assertEqual(self.notification.status, 'SENT')
+        self.assertIsNone(self.notification.error_message)
+        self.assertIn('error_message', self.notification.save.call_args.kwargs['update_fields'])
+    
+    def test_retry_that_succeeds_marks_sent(self):
+        send_email = self.deliver((False, 'recipient inbox full'), (True, None))
+        
+        self.assertEqual(send_email.call_count, 2)
+        self.assertEqual(self.notification.status, 'SENT')
+    
+    def test_already_delivered_is_skipped(self):
+        self.notification.status = 'SENT'
+        
+        send_email = self.deliver()
+        
+        self.assertFalse(send_email.called)
+        self.assertFalse(self.notification.save.called)
+    
+    def test_missing_row_is_dropped(self):
+        Notification.objects.get.side_effect = Notification.DoesNotExist
+        
+        send_email = self.deliver()
+        
+        self.assertFalse(send_email.called)
+
+
+class SendNotificationViewTests(TestCase):
+    """POST send/ stores the row and queues its delivery task"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {
+            'notification_type': 'EMAIL',
+            'event_type': 'order.confirmed',
+            'recipient_name': 'Asha',
+            'recipient_email': 'asha@example.com',
+            'subject': 'Order Confirmation',
+            'message': 'Thank you for your order',
+            'order_id': 42,
+        }
+    
+    def test_send_queues_delivery_and_returns_202(self):
+        task = mock.Mock()
+        with mock.patch.dict(DELIVERY_TASKS, {'EMAIL': task}):
+            response = self.client.post(reverse('send-notification'), self.payload, format='json')
+        
+        self.assertEqual(response.status_code, 202)
+        notification = Notification.objects.get(order_id=42)
+        self.assertEqual(notification.status, 'PENDING')
+        self.assertEqual(response.json()['notification']['notification_id'], str(notification.notification_id))
+        task.delay.assert_called_once_with(str(notification.notification_id))
+    
+    def test_publish_failure_marks_notification_failed(self):
+        task = mock.Mock()
+        task.delay.side_effect = ConnectionError('broker unreachable')
+        with mock.patch.dict(DELIVERY_TASKS, {'EMAIL': task}):
+            response = self.client.post(reverse('send-notification'), self.payload, format='json')
+        
+        self.assertEqual(response.status_code, 500)
+        notification = Notification.objects.get(order_id=42)
+        self.assertEqual(notification.status, 'FAILED')
+        self.assertTrue(notification.can_retry())
+
+
+class SendBulkNotificationsViewTests(TestCase):
+    """POST send-bulk/ inserts every row and queues each one's delivery task"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = [
+            {
+                'notification_type': 'EMAIL',
+                'event_type': 'order.confirmed',
+                'recipient_name': 'Asha',
+                'recipient_email': 'asha@example.com',
+                'subject': 'Order Confirmation',
+                'message': 'Thank you for your order',
+                'order_id': order_id,
+            }
+            for order_id in (1, 2, 3)
+        ]
+    
+    def send_bulk(self, task):
+        with mock.patch.dict(DELIVERY_TASKS, {'EMAIL': task}), \
+                mock.patch('notifications.views.celery_app.producer_or_acquire'):
+            return self.client.post(reverse('send-bulk-notifications'), self.payload, format='json')
+    
+    def test_send_bulk_queues_every_row(self):
+        task = mock.Mock()
+        
+        response = self.send_bulk(task)
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.json()['queued'], response.json()['failed']), (3, 0))
+        self.assertEqual(task.apply_async.call_count, 3)
+        self.assertEqual(Notification.objects.filter(status='PENDING').count(), 3)
+    
+    def test_publish_failure_marks_only_that_row_failed(self):
+        task = mock.Mock()
+        task.apply_async.side_effect = [None, ConnectionError('broker unreachable'), None]
+        
+        response = self.send_bulk(task)
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.json()['queued'], response.json()['failed']), (2, 1))
+        self.assertEqual(task.apply_async.call_count, 3)
+        statuses = dict(Notification.objects.values_list('order_id', 'status'))
+        self.assertEqual(statuses, {1: 'PENDING', 2: 'FAILED', 3: 'PENDING'})
+        self.assertTrue(Notification.objects.get(order_id=2).can_retry())
+
+
+class RetryNotificationViewTests(TestCase):
+    """POST <id>/retry/ claims the row before queueing a resend"""
+    
+    def test_concurrent_retry_is_rejected(self):
+        notification = _notification(status='FAILED', error_message='recipient inbox full')
+        url = reverse('retry-notification', args=[notification.notification_id])
+        # Read before the first retry claims the row, as a concurrent request would
+        stale = Notification.objects.get(pk=notification.pk)
+        
+        client = APIClient()
+        task = mock.Mock()
+        with mock.patch.dict(DELIVERY_TASKS, {'EMAIL': task}):
+            first = client.post(url)
+            with mock.patch.object(Notification.objects, 'get', return_value=stale):
+                second = client.post(url)
+        
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 409)
+        self.assertEqual(second.json()['error'], 'retry_in_progress')
+        task.delay.assert_called_once_with(str(notification.notification_id))
+        
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'PENDING')
+        self.assertEqual(notification.retry_count, 1)
+
+
+class NotificationStatsTests(TestCase):
+    """_compute_stats() counts from one $facet aggregation"""
+    
+    def test_compute_stats_shape(self):
+        _notification(status='SENT')
+        _notification(status='SENT', event_type='payment.succeeded')
+        _notification(status='FAILED', notification_type='SMS', event_type='shipment.shipped', recipient_phone='9999999999')
+        _notification()
+        
+        stats = _compute_stats()
+        
+        self.assertEqual(stats, {
+            'total': 4,
+            'sent': 2,
+            'failed': 1,
+            'pending': 1,
+            'by_type': {'EMAIL': 3, 'SMS': 1, 'PUSH': 0},
+            'by_event': {
+                'order.confirmed': 2,
+                'order.cancelled': 0,
+                'order.delivered': 0,
+                'payment.succeeded': 1,
+                'payment.failed': 0,
+                'payment.refunded': 0,
+                'shipment.shipped': 1,
+                'shipment.delivered': 0,
+            },
+        })
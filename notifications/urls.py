@@ -4,8 +4,10 @@ from . import views
 urlpatterns = [
     # Notification endpoints
     path('send/', views.send_notification, name='send-notification'),
+    path('send-bulk/', views.send_bulk_notifications, name='send-bulk-notifications'),
     path('', views.list_notifications, name='list-notifications'),
     path('stats/', views.notification_stats, name='notification-stats'),
+    path('by-order/<int:order_id>/', views.order_notifications, name='order-notifications'),
     path('<uuid:notification_id>/', views.get_notification, name='get-notification'),
     path('<uuid:notification_id>/retry/', views.retry_notification, name='retry-notification'),
     
@@ -2,96 +2,126 @@ from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.utils import timezone
+from django.core.cache import cache
+from pydantic import ValidationError
+from bson import ObjectId
 import logging
 
+from notification_service.celery import app as celery_app
 from .models import Notification
+from .schemas import (
+    BulkSendNotificationRequest,
+    SendNotificationRequest,
+    validation_details
+)
 from .serializers import (
     NotificationSerializer,
-    SendNotificationSerializer,
-    NotificationListSerializer
+    NotificationListSerializer,
+    notification_to_dict
 )
-from .services import send_email, send_sms
+from .tasks import DELIVERY_TASKS
 
 logger = logging.getLogger(__name__)
 
 
+# Stats are polled by dashboards and don't need to be real-time
+STATS_CACHE_KEY = 'notif:stats:v1'
+STATS_CACHE_TTL = 15  # seconds
+
+
 class NotificationPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
 
 
+def _build_notification(data):
+    """Unsaved PENDING Notification from validated send data"""
+    return Notification(
+        recipient_name=data['recipient_name'],
+        recipient_email=data.get('recipient_email'),
+        recipient_phone=data.get('recipient_phone'),
+        notification_type=data['notification_type'],
+        event_type=data['event_type'],
+        subject=data['subject'],
+        message=data['message'],
+        order_id=data.get('order_id'),
+        payment_id=data.get('payment_id'),
+        shipment_id=data.get('shipment_id'),
+        metadata=data.get('metadata', {})
+    )
+
+
+def _mark_enqueue_failed(notification, error):
+    """Mark a notification whose delivery task couldn't be published as FAILED, so /retry/ can recover it"""
+    notification.status = 'FAILED'
+    notification.error_message = f"Failed to queue delivery: {error}"
+    notification.save(update_fields=['status', 'error_message'])
+    logger.error(f"Failed to queue notification {notification.notification_id}: {error}")
+
+
+def _mark_bulk_enqueue_failed(notification, error):
+    """_mark_enqueue_failed() for a bulk-inserted row, written by notification_id rather than pk"""
+    notification.status = 'FAILED'
+    notification.error_message = f"Failed to queue delivery: {error}"
+    Notification.objects.filter(notification_id=notification.notification_id).update(
+        status=notification.status,
+        error_message=notification.error_message
+    )
+    logger.error(f"Failed to queue notification {notification.notification_id}: {error}")
+
+
 @api_view(['POST'])
 def send_notification(request):
     """
     POST /v1/notifications/send
-    Send a notification (email or SMS)
+    Queue a notification (email or SMS) for delivery
     """
-    serializer = SendNotificationSerializer(data=request.data)
-    
-    if not serializer.is_valid():
+    try:
+        data = SendNotificationRequest.model_validate(request.data).model_dump()
+    except ValidationError as e:
         return Response({
             'error': 'validation_error',
-            'details': serializer.errors
+            'details': validation_details(e)
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    data = serializer.validated_data
-    
     try:
-        # Create notification record
-        notification = Notification.objects.create(
-            recipient_name=data['recipient_name'],
-            recipient_email=data.get('recipient_email'),
-            recipient_phone=data.get('recipient_phone'),
-            notification_type=data['notification_type'],
-            event_type=data['event_type'],
-            subject=data['subject'],
-            message=data['message'],
-            order_id=data.get('order_id'),
-            payment_id=data.get('payment_id'),
-            shipment_id=data.get('shipment_id'),
-            metadata=data.get('metadata', {})
-        )
+        deliver = DELIVERY_TASKS.get(data['notification_type'])
         
-        # Send notification based on type
-        if data['notification_type'] == 'EMAIL':
-            success, error = send_email(
-                to_email=data['recipient_email'],
-                subject=data['subject'],
-                message=data['message']
-            )
-        elif data['notification_type'] == 'SMS':
-            success, error = send_sms(
-                to_phone=data['recipient_phone'],
-                message=data['message']
-            )
-        else:
-            success, error = False, "Unsupported notification type"
+        # Create notification record
+        notification = _build_notification(data)
+        if not deliver:
+            notification.status = 'FAILED'
+            notification.error_message = "Unsupported notification type"
+        notification.save()
         
-        if success:
-            notification.status = 'SENT'
-            notification.sent_at = timezone.now()
-            notification.save()
-            
-            logger.info(f"Notification {notification.notification_id} sent successfully")
+        if not deliver:
+            logger.error(f"Failed to send notification {notification.notification_id}: {notification.error_message}")
             
             return Response({
-                'message': 'Notification sent successfully',
-                'notification': NotificationSerializer(notification).data
-            }, status=status.HTTP_201_CREATED)
-        else:
-            notification.status = 'FAILED'
-            notification.error_message = error
-            notification.save()
-            
-            logger.error(f"Failed to send notification {notification.notification_id}: {error}")
+                'error': 'send_failed',
+                'message': notification.error_message,
+                'notification': notification_to_dict(notification)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        # Delivery runs on a Celery worker, which records SENT/FAILED
+        try:
+            deliver.delay(str(notification.notification_id))
+        except Exception as e:
+            _mark_enqueue_failed(notification, e)
             
             return Response({
                 'error': 'send_failed',
-                'message': error,
-                'notification': NotificationSerializer(notification).data
+                'message': notification.error_message,
+                'notification': notification_to_dict(notification)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        logger.info(f"Notification {notification.notification_id} queued for delivery")
+        
+        return Response({
+            'message': 'Notification queued for delivery',
+            'notification': notification_to_dict(notification)
+        }, status=status.HTTP_202_ACCEPTED)
             
     except Exception as e:
         logger.error(f"Error creating notification: {str(e)}")
@@ -101,6 +131,68 @@ def send_notification(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+def send_bulk_notifications(request):
+    """
+    POST /v1/notifications/send-bulk
+    Queue a list of notifications with one insert and one broker connection
+    """
+    try:
+        send_requests = BulkSendNotificationRequest.validate_python(request.data)
+    except ValidationError as e:
+        return Response({
+            'error': 'validation_error',
+            'details': validation_details(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        notifications = []
+        for send_request in send_requests:
+            notification = _build_notification(send_request.model_dump())
+            if notification.notification_type not in DELIVERY_TASKS:
+                notification.status = 'FAILED'
+                notification.error_message = "Unsupported notification type"
+            # djongo's ObjectIdField isn't a Django AutoField, so bulk_create()
+            # would insert every row with _id null (a duplicate key from the
+            # second row on) and can't return generated ids; assign them here
+            notification.pk = ObjectId()
+            notifications.append(notification)
+        
+        Notification.objects.bulk_create(notifications, batch_size=500)
+        
+        # Publish every delivery task over one pooled producer/channel; a row
+        # whose publish fails is marked FAILED so /retry/ can recover it
+        queued = 0
+        with celery_app.producer_or_acquire() as producer:
+            for notification in notifications:
+                if notification.status == 'PENDING':
+                    try:
+                        DELIVERY_TASKS[notification.notification_type].apply_async(
+                            args=[str(notification.notification_id)],
+                            producer=producer
+                        )
+                    except Exception as e:
+                        _mark_bulk_enqueue_failed(notification, e)
+                        continue
+                    queued += 1
+        
+        logger.info(f"Queued {queued} of {len(notifications)} notifications for delivery")
+        
+        return Response({
+            'message': 'Notifications queued for delivery',
+            'queued': queued,
+            'failed': len(notifications) - queued,
+            'notifications': NotificationSerializer(notifications, many=True).data
+        }, status=status.HTTP_202_ACCEPTED)
+        
+    except Exception as e:
+        logger.error(f"Error creating bulk notifications: {str(e)}")
+        return Response({
+            'error': 'processing_error',
+            'message': 'Failed to process notifications'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 def get_notification(request, notification_id):
     """
@@ -109,8 +201,7 @@ def get_notification(request, notification_id):
     """
     try:
         notification = Notification.objects.get(notification_id=notification_id)
-        serializer = NotificationSerializer(notification)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(notification_to_dict(notification), status=status.HTTP_200_OK)
     except Notification.DoesNotExist:
         return Response({
             'error': 'not_found',
@@ -124,7 +215,8 @@ def list_notifications(request):
     GET /v1/notifications
     List all notifications with pagination and filters
     """
-    queryset = Notification.objects.all()
+    # Skip the large message/metadata columns the list never returns
+    queryset = Notification.objects.only(*NotificationListSerializer.FIELDS).order_by('-created_at')
     
     # Apply filters
     notification_type = request.query_params.get('type')
@@ -153,6 +245,23 @@ def list_notifications(request):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+def order_notifications(request, order_id):
+    """
+    GET /v1/notifications/by-order/{order_id}
+    All notifications for one order, newest first, from a single query
+    """
+    # Served by order_hist_idx (order_id, -created_at)
+    notifications = Notification.objects.only(*NotificationListSerializer.FIELDS).filter(
+        order_id=order_id
+    ).order_by('-created_at')
+    
+    return Response({
+        'order_id': order_id,
+        'notifications': NotificationListSerializer(notifications, many=True).data
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 def retry_notification(request, notification_id):
     """
@@ -168,36 +277,48 @@ def retry_notification(request, notification_id):
                 'message': 'Notification cannot be retried (max retries reached or not failed)'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Attempt to resend
-        if notification.notification_type == 'EMAIL':
-            success, error = send_email(
-                to_email=notification.recipient_email,
-                subject=notification.subject,
-                message=notification.message
-            )
-        elif notification.notification_type == 'SMS':
-            success, error = send_sms(
-                to_phone=notification.recipient_phone,
-                message=notification.message
-            )
-        else:
-            success, error = False, "Unsupported notification type"
-        
+        # Claim the retry: only one request can move the row out of FAILED at
+        # this retry_count, so concurrent retries neither double-send nor lose
+        # an increment. MongoDB has no SELECT ... FOR UPDATE; this
+        # compare-and-set is the equivalent.
+        collection = Notification.collection()
+        claim = collection.update_one(
+            {'_id': notification.pk, 'status': 'FAILED', 'retry_count': notification.retry_count},
+            {'$set': {'status': 'PENDING'}, '$inc': {'retry_count': 1}}
+        )
+        if not claim.modified_count:
+            return Response({
+                'error': 'retry_in_progress',
+                'message': 'Notification is already being retried'
+            }, status=status.HTTP_409_CONFLICT)
         notification.retry_count += 1
+        notification.status = 'PENDING'
         
-        if success:
-            notification.status = 'SENT'
-            notification.sent_at = timezone.now()
-            notification.error_message = None
-        else:
-            notification.error_message = error
-        
-        notification.save()
+        # Resend on a delivery worker like a fresh send; it records SENT/FAILED.
+        # If the task can't be queued, put the row back to FAILED so it isn't
+        # stranded in PENDING.
+        deliver = DELIVERY_TASKS.get(notification.notification_type)
+        try:
+            if not deliver:
+                raise ValueError("Unsupported notification type")
+            deliver.delay(str(notification.notification_id))
+        except Exception as e:
+            updates = {'status': 'FAILED', 'error_message': str(e)}
+            collection.update_one({'_id': notification.pk}, {'$set': updates})
+            for field, value in updates.items():
+                setattr(notification, field, value)
+            logger.error(f"Failed to queue retry of notification {notification.notification_id}: {e}")
+            
+            return Response({
+                'error': 'retry_failed',
+                'message': notification.error_message,
+                'notification': notification_to_dict(notification)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
         return Response({
-            'message': 'Retry completed',
-            'notification': NotificationSerializer(notification).data
-        }, status=status.HTTP_200_OK)
+            'message': 'Retry queued for delivery',
+            'notification': notification_to_dict(notification)
+        }, status=status.HTTP_202_ACCEPTED)
         
     except Notification.DoesNotExist:
         return Response({
@@ -206,33 +327,54 @@ def retry_notification(request, notification_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
-@api_view(['GET'])
-def notification_stats(request):
-    """
-    GET /v1/notifications/stats
-    Get notification statistics
-    """
-    total = Notification.objects.count()
-    sent = Notification.objects.filter(status='SENT').count()
-    failed = Notification.objects.filter(status='FAILED').count()
-    pending = Notification.objects.filter(status='PENDING').count()
+def _compute_stats():
+    """Notification counts by status, type and event"""
+    # One aggregation over the collection instead of a COUNT per status/type/event
+    facets = next(Notification.collection().aggregate([
+        {'$facet': {
+            field: [{'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}]
+            for field in ('status', 'notification_type', 'event_type')
+        }}
+    ]))
+    counts = {
+        field: {group['_id']: group['count'] for group in groups}
+        for field, groups in facets.items()
+    }
     
-    by_type = {}
-    for notif_type, _ in Notification.NOTIFICATION_TYPES:
-        by_type[notif_type] = Notification.objects.filter(notification_type=notif_type).count()
+    by_status = counts['status']
+    total = sum(by_status.values())
+    sent = by_status.get('SENT', 0)
+    failed = by_status.get('FAILED', 0)
+    pending = by_status.get('PENDING', 0)
     
-    by_event = {}
-    for event_type, _ in Notification.EVENT_TYPES:
-        by_event[event_type] = Notification.objects.filter(event_type=event_type).count()
+    by_type = {
+        notif_type: counts['notification_type'].get(notif_type, 0)
+        for notif_type, _ in Notification.NOTIFICATION_TYPES
+    }
     
-    return Response({
+    by_event = {
+        event_type: counts['event_type'].get(event_type, 0)
+        for event_type, _ in Notification.EVENT_TYPES
+    }
+    
+    return {
         'total': total,
         'sent': sent,
         'failed': failed,
         'pending': pending,
         'by_type': by_type,
         'by_event': by_event
-    }, status=status.HTTP_200_OK)
+    }
+
+
+@api_view(['GET'])
+def notification_stats(request):
+    """
+    GET /v1/notifications/stats
+    Get notification statistics (cached for STATS_CACHE_TTL seconds)
+    """
+    stats = cache.get_or_set(STATS_CACHE_KEY, _compute_stats, timeout=STATS_CACHE_TTL)
+    return Response(stats, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -250,8 +392,9 @@ def ready_check(request):
     """Readiness check endpoint"""
     from django.db import connection
     try:
-        # Check MongoDB connection
-        Notification.objects.count()
+        # Check MongoDB connection with a ping; counting the collection scans it
+        connection.ensure_connection()
+        connection.connection.command('ping')
         return Response({
             'status': 'ready',
             'database': 'connected'